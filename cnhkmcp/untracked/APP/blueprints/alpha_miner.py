@@ -2,23 +2,25 @@
 Alpha Miner Blueprint - AI-powered alpha discovery and optimization
 """
 import os
+import re
 import sys
+import csv
 import json
+import functools
 import logging
-import traceback
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from flask import Blueprint, render_template, request, jsonify
 
-# Add parent directory to path to import ace_lib
+# Add parent directory to path so ace_lib can be imported lazily where needed
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, parent_dir)
-
-try:
-    from ace_lib import SingleSession, create_alpha, get_user_profile, simulate_alpha
-    from helpful_functions import get_all_alphas_stats
-except ImportError:
-    print("Warning: Could not import ace_lib or helpful_functions")
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,123 +30,277 @@ brain_api_url = os.environ.get("BRAIN_API_URL", "https://api.worldquantbrain.com
 
 alpha_miner_bp = Blueprint('alpha_miner', __name__)
 
-# Cache for resources
+# Cache for resources; datasets and timestamps are keyed by
+# (instrument_type, region, delay, universe), responses by URL as
+# (etag, last_modified, parsed_json) for conditional GETs
+CACHE_TTL = 300  # seconds
 CACHE = {
-    'datasets': None,
+    'datasets': {},
     'operators': None,
     'user_profile': None,
-    'last_update': None
+    'last_update': {},
+    'responses': {}
+}
+_CACHE_LOCK = threading.Lock()
+
+# Resource fetches in progress, keyed like CACHE['datasets'], so concurrent cache
+# misses share one fetch without holding _CACHE_LOCK while BRAIN responds
+_RESOURCE_INFLIGHT = {}
+
+# Default (connect, read) timeouts for BRAIN calls, so a hung request fails and
+# counts towards the circuit breaker instead of blocking its caller forever
+BRAIN_TIMEOUT = (10, 30)
+
+# Authenticated BRAIN session shared across requests
+SESSION_TTL = 3500  # seconds; re-authenticate well before the BRAIN token expires
+_SESSION_CACHE = {
+    'session': None,
+    'expires_at': 0
+}
+_SESSION_LOCK = threading.Lock()
+
+# Pooled HTTP session for LLM provider calls (Ollama/DeepSeek/OpenAI)
+# (connect, read) timeouts: fail fast when a provider is unreachable, but give
+# slow generations the full read window
+LLM_TIMEOUT = (10, 180)
+_LLM_SESSION = requests.Session()
+_llm_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+_LLM_SESSION.mount('https://', _llm_adapter)
+_LLM_SESSION.mount('http://', _llm_adapter)
+
+# Circuit breaker for BRAIN: after BREAKER_THRESHOLD consecutive failures
+# (connection errors or 5xx), fail fast for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30  # seconds
+_BREAKER = {
+    'failures': 0,
+    'open_until': 0
+}
+_BREAKER_LOCK = threading.Lock()
+
+# LLM calls currently in progress, keyed like _call_llm_cached, so identical
+# concurrent requests wait on one call
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# user_config.json lives in the untracked folder, one level above the app
+USER_CONFIG_PATH = os.path.join(os.path.dirname(parent_dir), 'user_config.json')
+
+# Parsed credentials, invalidated when user_config.json's mtime changes
+_CRED_CACHE = {
+    'mtime': 0,
+    'email': None,
+    'password': None
+}
+_CRED_LOCK = threading.Lock()
+
+# Parsed operaters.csv, invalidated when the file's mtime changes
+_OPERATORS_CACHE = {
+    'mtime': 0,
+    'data': None
 }
 
 def load_user_config_credentials():
     """Load credentials from user_config.json in the untracked folder."""
     try:
-        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        untracked_dir = os.path.dirname(app_dir)
-        config_path = os.path.join(untracked_dir, 'user_config.json')
-
-        if not os.path.exists(config_path):
-            return None, None
-
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            credentials = config.get('credentials', {})
-            email = credentials.get('email')
-            password = credentials.get('password')
-            return email, password
+        with _CRED_LOCK:
+            try:
+                mtime = os.stat(USER_CONFIG_PATH).st_mtime
+            except FileNotFoundError:
+                return None, None
+
+            if _CRED_CACHE['mtime'] != mtime:
+                with open(USER_CONFIG_PATH, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                credentials = config.get('credentials', {})
+                _CRED_CACHE['email'] = credentials.get('email')
+                _CRED_CACHE['password'] = credentials.get('password')
+                _CRED_CACHE['mtime'] = mtime
+
+            return _CRED_CACHE['email'], _CRED_CACHE['password']
     except Exception as e:
-        logger.error(f"Error loading user_config.json: {e}")
+        logger.error("Error loading user_config.json: %s", e)
         return None, None
 
-def create_brain_session():
-    """Create a SingleSession using credentials from user_config.json."""
-    email, password = load_user_config_credentials()
-    if not email or not password:
-        raise ValueError('Username and password are required. Please check user_config.json')
-    s = SingleSession()
-    s.auth = (email, password)
-
-    auth_response = s.post(f"{brain_api_url}/authentication")
-    if auth_response.status_code not in [200, 201]:
-        raise ValueError(f"Authentication failed: {auth_response.status_code}")
-
-    return s
+def create_brain_session(force_refresh=False, stale_expires_at=None):
+    """Return an authenticated SingleSession, reusing the cached one until it expires.
+
+    With force_refresh, pass the _SESSION_CACHE['expires_at'] value seen before the
+    failing request as stale_expires_at: if another thread has re-authenticated
+    since then, its session is reused instead of logging in again.
+    """
+    from ace_lib import SingleSession
+
+    with _SESSION_LOCK:
+        s = _SESSION_CACHE['session']
+        if s is not None and time.time() < _SESSION_CACHE['expires_at']:
+            if not force_refresh:
+                return s
+            if stale_expires_at is not None and _SESSION_CACHE['expires_at'] != stale_expires_at:
+                return s
+
+        email, password = load_user_config_credentials()
+        if not email or not password:
+            raise ValueError('Username and password are required. Please check user_config.json')
+        s = SingleSession()
+        s.auth = (email, password)
+
+        auth_response = s.post(f"{brain_api_url}/authentication", timeout=BRAIN_TIMEOUT)
+        if auth_response.status_code not in [200, 201]:
+            _SESSION_CACHE['session'] = None
+            raise ValueError(f"Authentication failed: {auth_response.status_code}")
+
+        _SESSION_CACHE['session'] = s
+        _SESSION_CACHE['expires_at'] = time.time() + SESSION_TTL
+        return s
+
+class BrainUnavailableError(requests.exceptions.ConnectionError):
+    """Raised instead of calling BRAIN while the circuit breaker is open."""
+
+def _record_brain_result(ok):
+    """Track consecutive BRAIN failures and open the breaker after too many."""
+    with _BREAKER_LOCK:
+        if ok:
+            _BREAKER['failures'] = 0
+            return
+        _BREAKER['failures'] += 1
+        if _BREAKER['failures'] >= BREAKER_THRESHOLD:
+            _BREAKER['open_until'] = time.time() + BREAKER_COOLDOWN
+            _BREAKER['failures'] = 0
+            logger.warning("BRAIN API failing, pausing requests for %s seconds", BREAKER_COOLDOWN)
+
+def brain_get(s, url, **kwargs):
+    """GET from BRAIN, re-authenticating once if the cached session has expired."""
+    if time.time() < _BREAKER['open_until']:
+        raise BrainUnavailableError('BRAIN API is unavailable, try again shortly')
+
+    kwargs.setdefault('timeout', BRAIN_TIMEOUT)
+    session_expires_at = _SESSION_CACHE['expires_at']
+    try:
+        response = s.get(url, **kwargs)
+        if response.status_code == 401:
+            s = create_brain_session(force_refresh=True, stale_expires_at=session_expires_at)
+            response = s.get(url, **kwargs)
+    except requests.exceptions.RequestException:
+        _record_brain_result(False)
+        raise
+    _record_brain_result(response.status_code < 500)
+    return response
+
+def brain_get_json(s, url):
+    """GET a BRAIN JSON resource, revalidating any cached body with ETag/Last-Modified.
+
+    Returns the parsed JSON, or None if the request failed.
+    """
+    cached = CACHE['responses'].get(url)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    response = brain_get(s, url, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[2]
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    # Only worth keeping the body if BRAIN gave us something to revalidate with
+    if etag or last_modified:
+        CACHE['responses'][url] = (etag, last_modified, data)
+    return data
 
 @alpha_miner_bp.route('/')
 def alpha_miner():
     """Render the alpha miner page"""
     return render_template('alpha_miner.html')
 
-@alpha_miner_bp.route('/api/get-resources', methods=['POST'])
-def get_resources():
-    """Get available datasets, operators, and user info"""
+def _load_operators():
+    """Load operators from operaters.csv, re-parsing only when the file changes."""
     try:
-        # Create session from config
-        s = create_brain_session()
-        
-        resources = {}
-        
-        # Get datasets
-        resources['datasets'] = []
+        operators_file = os.path.join(parent_dir, 'operaters.csv')
         try:
-            # Default filters (match common simulator defaults)
-            instrument_type = 'EQUITY'
-            region = 'USA'
-            delay = '1'
-            universe = 'TOP3000'
-
-            url_false = (
-                f"https://api.worldquantbrain.com/data-sets?instrumentType={instrument_type}"
-                f"&region={region}&delay={delay}&universe={universe}&theme=false"
-            )
-            url_true = (
-                f"https://api.worldquantbrain.com/data-sets?instrumentType={instrument_type}"
-                f"&region={region}&delay={delay}&universe={universe}&theme=true"
-            )
+            mtime = os.stat(operators_file).st_mtime
+        except FileNotFoundError:
+            return []
+
+        if _OPERATORS_CACHE['data'] is not None and _OPERATORS_CACHE['mtime'] == mtime:
+            return _OPERATORS_CACHE['data']
+
+        with open(operators_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            # Resolve column positions once; the file uses name/category/description
+            # headers, older copies used Operator/Category/Description
+            columns = {name.strip().lower(): i for i, name in enumerate(next(reader, []))}
+            i_name = columns.get('operator', columns.get('name'))
+            i_cat = columns.get('category')
+            i_desc = columns.get('description')
+            if i_name is None or i_cat is None or i_desc is None:
+                raise ValueError(f"Unexpected operaters.csv header: {sorted(columns)}")
+            width = max(i_name, i_cat, i_desc) + 1
+            operators = [
+                {'name': row[i_name], 'category': row[i_cat], 'description': row[i_desc]}
+                for row in reader if len(row) >= width
+            ]
+        _OPERATORS_CACHE['data'] = operators[:100]  # Limit to 100
+        _OPERATORS_CACHE['mtime'] = mtime
+        return _OPERATORS_CACHE['data']
+    except Exception as e:
+        logger.error("Error reading operators: %s", e)
+        return []
 
-            response_false = s.get(url_false)
-            response_true = s.get(url_true)
+def _fetch_resources(instrument_type, region, delay, universe):
+    """Fetch datasets, operators, and user profile from BRAIN and disk."""
+    # Create session from config
+    s = create_brain_session()
+    
+    resources = {}
+
+    url_false = (
+        f"https://api.worldquantbrain.com/data-sets?instrumentType={instrument_type}"
+        f"&region={region}&delay={delay}&universe={universe}&theme=false"
+    )
+    url_true = (
+        f"https://api.worldquantbrain.com/data-sets?instrumentType={instrument_type}"
+        f"&region={region}&delay={delay}&universe={universe}&theme=true"
+    )
+
+    # The three BRAIN calls are independent, so overlap their round-trips
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        future_false = executor.submit(brain_get_json, s, url_false)
+        future_true = executor.submit(brain_get_json, s, url_true)
+        future_profile = executor.submit(brain_get, s, 'https://api.worldquantbrain.com/users/self')
 
-            if response_false.status_code == 200:
-                datasets_false = response_false.json().get('results', [])
-            else:
-                datasets_false = []
+        # Get datasets
+        resources['datasets'] = []
+        try:
+            data_false = future_false.result()
+            data_true = future_true.result()
 
-            if response_true.status_code == 200:
-                datasets_true = response_true.json().get('results', [])
-            else:
-                datasets_true = []
+            datasets_false = data_false.get('results', []) if data_false else []
+            datasets_true = data_true.get('results', []) if data_true else []
 
             all_datasets = datasets_false + datasets_true
             resources['datasets'] = all_datasets[:50]
         except Exception as e:
-            logger.error(f"Error fetching datasets: {e}")
+            logger.error("Error fetching datasets: %s", e)
             resources['datasets'] = []
-        
+
         # Get operators from CSV file
-        try:
-            operators_file = os.path.join(parent_dir, 'operaters.csv')
-            if os.path.exists(operators_file):
-                import csv
-                operators = []
-                with open(operators_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        operators.append({
-                            'name': row.get('Operator', ''),
-                            'category': row.get('Category', ''),
-                            'description': row.get('Description', '')
-                        })
-                resources['operators'] = operators[:100]  # Limit to 100
-            else:
-                resources['operators'] = []
-        except Exception as e:
-            logger.error(f"Error reading operators: {e}")
-            resources['operators'] = []
-        
+        resources['operators'] = _load_operators()
+
         # Get user profile to check available submission types
         try:
-            profile_response = s.get('https://api.worldquantbrain.com/users/self')
+            profile_response = future_profile.result()
             if profile_response.status_code == 200:
                 profile = profile_response.json()
                 resources['user_profile'] = {
@@ -154,13 +310,73 @@ def get_resources():
                     'can_submit_power_pool': profile.get('powerPoolEligible', False),
                 }
         except Exception as e:
-            logger.error(f"Error fetching user profile: {e}")
+            logger.error("Error fetching user profile: %s", e)
             resources['user_profile'] = {
                 'can_submit_regular': True,
                 'can_submit_power_pool': False
             }
+
+    return resources
+
+@alpha_miner_bp.route('/api/get-resources', methods=['POST'])
+def get_resources():
+    """Get available datasets, operators, and user info"""
+    try:
+        # Default filters (match common simulator defaults)
+        instrument_type = 'EQUITY'
+        region = 'USA'
+        delay = '1'
+        universe = 'TOP3000'
+        cache_key = (instrument_type, region, delay, universe)
+        refresh = request.args.get('refresh') == '1'
+
+        # Only check freshness under the lock; a miss is fetched outside it, and
+        # concurrent misses for the same key wait on the one fetch in progress
+        with _CACHE_LOCK:
+            last_update = CACHE['last_update'].get(cache_key)
+            cache_fresh = (
+                not refresh
+                and last_update is not None
+                and time.time() - last_update < CACHE_TTL
+                and CACHE['datasets'].get(cache_key)
+            )
+
+            if cache_fresh:
+                resources = {
+                    'datasets': CACHE['datasets'][cache_key],
+                    'operators': CACHE['operators'],
+                }
+                if CACHE['user_profile'] is not None:
+                    resources['user_profile'] = CACHE['user_profile']
+            else:
+                future = _RESOURCE_INFLIGHT.get(cache_key)
+                is_leader = future is None
+                if is_leader:
+                    future = Future()
+                    _RESOURCE_INFLIGHT[cache_key] = future
+
+        if not cache_fresh:
+            if not is_leader:
+                resources = future.result()
+            else:
+                try:
+                    resources = _fetch_resources(instrument_type, region, delay, universe)
+                except Exception as e:
+                    future.set_exception(e)
+                    raise
+                else:
+                    with _CACHE_LOCK:
+                        CACHE['datasets'][cache_key] = resources['datasets']
+                        CACHE['operators'] = resources['operators']
+                        CACHE['user_profile'] = resources.get('user_profile')
+                        CACHE['last_update'][cache_key] = time.time()
+                    future.set_result(resources)
+                finally:
+                    with _CACHE_LOCK:
+                        _RESOURCE_INFLIGHT.pop(cache_key, None)
         
         # Get available instruments and regions
+        resources = dict(resources)
         resources['instruments'] = ['EQUITY', 'FUTURES']
         resources['regions'] = ['USA', 'CHN', 'EUR', 'JPN', 'GLB']
         resources['delays'] = [0, 1]
@@ -171,13 +387,191 @@ def get_resources():
         })
     
     except Exception as e:
-        logger.error(f"Error in get_resources: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error in get_resources: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+LLM_PROVIDERS = ('ollama', 'deepseek', 'openai')
+
+# Response cleanup: backtick fences, then the first line that isn't a heading
+# or an echoed "Your alpha expression:" / "Optimized expression:" label
+_CODE_FENCE_RE = re.compile(r'`+')
+_FIRST_EXPR_RE = re.compile(r'^[^\S\n]*(?!#|your|optimized)(\S.*?)[^\S\n]*$', re.IGNORECASE | re.MULTILINE)
+
+class LLMAPIError(Exception):
+    """Raised when an LLM provider returns a non-200 response."""
+
+    def __init__(self, status_code, text):
+        super().__init__(f'AI API error: {status_code}')
+        self.status_code = status_code
+        self.text = text
+
+def _extract_expression(text):
+    """Strip code fences and return the first line that looks like an expression."""
+    text = _CODE_FENCE_RE.sub('', text).strip()
+    # Take the first non-empty line that doesn't look like markdown or a label
+    match = _FIRST_EXPR_RE.search(text)
+    return match.group(1) if match else text
+
+# Prompt templates, filled with str.format per request
+_GEN_PROMPT = """You are an expert quantitative analyst specializing in WorldQuant BRAIN alpha creation.
+
+Generate a creative and potentially profitable alpha expression using the following constraints:
+
+Dataset: {dataset}
+Instrument: {instrument}
+Region: {region}
+Delay: {delay}
+Strategy Type: {strategy_type}
+
+Requirements:
+1. Use realistic data fields from the specified dataset (e.g., {dataset}_field1, {dataset}_field2)
+2. Incorporate appropriate operators (ts_rank, group_rank, ts_std_dev, etc.)
+3. The expression should implement a {strategy_type} strategy
+4. Keep complexity moderate (not too simple, not too complex)
+5. Consider neutralization and data preprocessing
+
+Output ONLY the alpha expression, nothing else. Example format:
+rank(ts_decay_linear(close, 10) / ts_mean(volume, 20))
+
+Your alpha expression:"""
+
+_OPT_PROMPT = """You are an expert quantitative analyst. Analyze this alpha and suggest an optimized version.
+
+Original Alpha: {original_expression}
+
+Performance Metrics:
+- Fitness: {fitness}
+- Sharpe: {sharpe}
+- Turnover: {turnover}
+- Returns: {returns}
+
+Problems identified:
+{problems}
+
+Suggest an optimized alpha expression that addresses these issues. Consider:
+1. Adding decay to reduce turnover
+2. Using different time windows
+3. Adding rank/normalization
+4. Using group operations for stability
+5. Combining multiple signals
+
+Output ONLY the optimized alpha expression, no explanation.
+
+Optimized expression:"""
+
+def _identify_problems(performance):
+    """List the weak spots in a backtest's performance as prompt bullet lines."""
+    def is_number(value):
+        return isinstance(value, (int, float))
+
+    fitness = performance.get('fitness')
+    sharpe = performance.get('sharpe')
+    turnover = performance.get('turnover')
+
+    problems = []
+    if is_number(sharpe) and sharpe < 1.5:
+        problems.append('- Low Sharpe ratio')
+    if is_number(turnover) and turnover > 0.3:
+        problems.append('- High turnover')
+    if is_number(fitness) and fitness < 1.5:
+        problems.append('- Low fitness')
+    return '\n'.join(problems)
+
+@functools.lru_cache(maxsize=32)
+def _resolve_endpoint(provider, api_base_url):
+    """Return (api_url, uses_bearer_auth) for an OpenAI-compatible chat completions call."""
+    if provider == 'ollama':
+        return f"{api_base_url.rstrip('/')}/v1/chat/completions", False
+    elif provider == 'deepseek':
+        return 'https://api.deepseek.com/chat/completions', True
+    elif provider == 'openai':
+        api_url = f"{api_base_url.rstrip('/')}/chat/completions" if api_base_url else 'https://api.openai.com/v1/chat/completions'
+        return api_url, True
+    raise ValueError(f'Unknown provider: {provider}')
+
+def _build_llm_request(provider, api_key, api_base_url):
+    """Return (api_url, headers) for an OpenAI-compatible chat completions call."""
+    api_url, uses_bearer_auth = _resolve_endpoint(provider, api_base_url)
+    headers = {'Content-Type': 'application/json'}
+    if uses_bearer_auth:
+        headers['Authorization'] = f'Bearer {api_key}'
+    return api_url, headers
+
+# Default sampling temperature; only deterministic (temperature 0) calls are cached
+LLM_TEMPERATURE = 0.7
+
+@functools.lru_cache(maxsize=512)
+def _call_llm_cached(provider, model, api_key, api_base_url, prompt, temperature):
+    """Ask the LLM for an alpha expression and return the first usable line."""
+    api_url, headers = _build_llm_request(provider, api_key, api_base_url)
+
+    api_data = {
+        'model': model,
+        'messages': [
+            {'role': 'user', 'content': prompt}
+        ],
+        'temperature': temperature,
+        'max_tokens': 500
+    }
+
+    # Call AI API
+    response = _LLM_SESSION.post(api_url, headers=headers, json=api_data, timeout=LLM_TIMEOUT)
+    if response.status_code != 200:
+        raise LLMAPIError(response.status_code, response.text)
+
+    response_data = response.json()
+    return _extract_expression(response_data['choices'][0]['message']['content'])
+
+def _llm_options(data):
+    """Validate the optional temperature/nocache request fields.
+
+    Returns (temperature, nocache, error); error is a message for a 400 response.
+    """
+    temperature = data.get('temperature', LLM_TEMPERATURE)
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not 0 <= temperature <= 2:
+        return None, None, 'temperature must be a number between 0 and 2'
+    nocache = data.get('nocache', False)
+    if not isinstance(nocache, bool):
+        return None, None, 'nocache must be true or false'
+    return float(temperature), nocache, None
+
+def _call_llm(provider, model, api_key, api_base_url, prompt, temperature=LLM_TEMPERATURE, nocache=False):
+    """Call the LLM, caching only deterministic (temperature 0) requests.
+
+    Sampled requests always get a fresh completion, so asking again yields a new
+    alpha. Concurrent cacheable callers with the same arguments share one
+    in-flight request instead of each waiting on their own LLM round-trip.
+    """
+    key = (provider, model, api_key, api_base_url, prompt, temperature)
+    if nocache or temperature > 0:
+        return _call_llm_cached.__wrapped__(*key)
+
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _INFLIGHT[key] = future
+
+    if not is_leader:
+        return future.result()
+
+    try:
+        result = _call_llm_cached(*key)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        # Later callers are served by the lru_cache once the result is in
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
 @alpha_miner_bp.route('/api/generate-alpha', methods=['POST'])
 def generate_alpha():
     """Generate alpha expression using AI"""
@@ -198,96 +592,137 @@ def generate_alpha():
         strategy_type = data.get('strategy_type', 'momentum')
         
         # Build prompt for AI
-        prompt = f"""You are an expert quantitative analyst specializing in WorldQuant BRAIN alpha creation.
-
-Generate a creative and potentially profitable alpha expression using the following constraints:
+        prompt = _GEN_PROMPT.format(
+            dataset=dataset, instrument=instrument, region=region,
+            delay=delay, strategy_type=strategy_type
+        )
 
-Dataset: {dataset}
-Instrument: {instrument}
-Region: {region}
-Delay: {delay}
-Strategy Type: {strategy_type}
+        if provider not in LLM_PROVIDERS:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown provider: {provider}'
+            }), 400
 
-Requirements:
-1. Use realistic data fields from the specified dataset (e.g., {dataset}_field1, {dataset}_field2)
-2. Incorporate appropriate operators (ts_rank, group_rank, ts_std_dev, etc.)
-3. The expression should implement a {strategy_type} strategy
-4. Keep complexity moderate (not too simple, not too complex)
-5. Consider neutralization and data preprocessing
+        temperature, nocache, error = _llm_options(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
 
-Output ONLY the alpha expression, nothing else. Example format:
-rank(ts_decay_linear(close, 10) / ts_mean(volume, 20))
+        try:
+            alpha_expression = _call_llm(
+                provider, model, api_key, api_base_url, prompt,
+                temperature=temperature, nocache=nocache
+            )
+        except LLMAPIError as e:
+            return jsonify({
+                'success': False,
+                'error': f'AI API error: {e.status_code} - {e.text}'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'expression': alpha_expression,
+            'parameters': {
+                'dataset': dataset,
+                'instrument': instrument,
+                'region': region,
+                'delay': delay,
+                'strategy_type': strategy_type
+            }
+        })
+    
+    except Exception as e:
+        logger.exception("Error in generate_alpha: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
-Your alpha expression:"""
+# Upper bound on targets per /api/generate-alphas-batch request (one LLM call each)
+MAX_BATCH_TARGETS = 20
 
-        # Prepare API request
-        if provider == 'ollama':
-            api_url = f"{api_base_url.rstrip('/')}/v1/chat/completions"
-            headers = {'Content-Type': 'application/json'}
-        elif provider == 'deepseek':
-            api_url = 'https://api.deepseek.com/chat/completions'
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
-        elif provider == 'openai':
-            api_url = f"{api_base_url.rstrip('/')}/chat/completions" if api_base_url else 'https://api.openai.com/v1/chat/completions'
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
-        else:
+@alpha_miner_bp.route('/api/generate-alphas-batch', methods=['POST'])
+def generate_alphas_batch():
+    """Generate alpha expressions from several providers/models concurrently"""
+    try:
+        data = request.json
+        targets = data.get('targets', [])
+        
+        if not targets:
             return jsonify({
                 'success': False,
-                'error': f'Unknown provider: {provider}'
+                'error': 'Missing targets'
             }), 400
-        
-        api_data = {
-            'model': model,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7,
-            'max_tokens': 500
-        }
-        
-        # Call AI API
-        response = requests.post(api_url, headers=headers, json=api_data, timeout=180)
-        
-        if response.status_code == 200:
-            response_data = response.json()
-            alpha_expression = response_data['choices'][0]['message']['content'].strip()
-            
-            # Clean up the expression
-            alpha_expression = alpha_expression.replace('```', '').replace('`', '').strip()
-            lines = alpha_expression.split('\n')
-            # Take the first non-empty line that doesn't look like markdown
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('#') and not line.lower().startswith('your'):
-                    alpha_expression = line
-                    break
-            
+        if not isinstance(targets, list) or not all(isinstance(t, dict) for t in targets):
             return jsonify({
-                'success': True,
-                'expression': alpha_expression,
-                'parameters': {
-                    'dataset': dataset,
-                    'instrument': instrument,
-                    'region': region,
-                    'delay': delay,
-                    'strategy_type': strategy_type
-                }
-            })
-        else:
+                'success': False,
+                'error': 'targets must be a list of objects'
+            }), 400
+        if len(targets) > MAX_BATCH_TARGETS:
             return jsonify({
                 'success': False,
-                'error': f'AI API error: {response.status_code} - {response.text}'
-            }), 500
+                'error': f'Too many targets (max {MAX_BATCH_TARGETS})'
+            }), 400
+        
+        # Get generation parameters
+        dataset = data.get('dataset', '')
+        instrument = data.get('instrument', 'EQUITY')
+        region = data.get('region', 'USA')
+        delay = data.get('delay', 1)
+        strategy_type = data.get('strategy_type', 'momentum')
+        temperature, nocache, error = _llm_options(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
+        prompt = _GEN_PROMPT.format(
+            dataset=dataset, instrument=instrument, region=region,
+            delay=delay, strategy_type=strategy_type
+        )
+
+        def generate_one(target):
+            provider = target.get('provider', 'ollama')
+            model = target.get('model', 'qwen2.5:7b')
+            result = {'provider': provider, 'model': model, 'expression': None, 'error': None}
+            if provider not in LLM_PROVIDERS:
+                result['error'] = f'Unknown provider: {provider}'
+                return result
+            try:
+                result['expression'] = _call_llm(
+                    provider, model,
+                    target.get('api_key', ''),
+                    target.get('api_base_url', 'http://localhost:11434'),
+                    prompt, temperature=temperature, nocache=nocache
+                )
+            except LLMAPIError as e:
+                result['error'] = f'AI API error: {e.status_code} - {e.text}'
+            except Exception as e:
+                logger.error("Error generating with %s/%s: %s", provider, model, e)
+                result['error'] = str(e)
+            return result
+
+        # Each target is an independent LLM round-trip, so run them side by side
+        with ThreadPoolExecutor(max_workers=min(8, len(targets))) as executor:
+            results = list(executor.map(generate_one, targets))
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'parameters': {
+                'dataset': dataset,
+                'instrument': instrument,
+                'region': region,
+                'delay': delay,
+                'strategy_type': strategy_type
+            }
+        })
     
     except Exception as e:
-        logger.error(f"Error in generate_alpha: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error in generate_alphas_batch: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -310,46 +745,51 @@ def backtest_alpha():
         neutralization = data.get('neutralization', 'SUBINDUSTRY')
         decay = data.get('decay', 0)
         
-        # Create and simulate alpha
+        # Start a simulation; BRAIN assigns the alpha ID once it completes
         try:
-            alpha_id = create_alpha(
-                s=s,
+            from ace_lib import generate_alpha as build_simulation_data, start_simulation
+
+            simulation_data = build_simulation_data(
                 regular=expression,
-                type_=instrument,
                 region=region,
                 universe=universe,
-                delay=delay,
-                neutralization=neutralization,
-                decay=decay,
-                name=f"AI_Mined_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                delay=int(delay),
+                decay=int(decay),
+                neutralization=neutralization
             )
+            # generate_alpha always fills in EQUITY
+            simulation_data['settings']['instrumentType'] = instrument
+            session_expires_at = _SESSION_CACHE['expires_at']
+            simulate_response = start_simulation(s, simulation_data)
+            if simulate_response.status_code == 401:
+                # Cached session expired early; re-authenticate once and retry
+                s = create_brain_session(force_refresh=True, stale_expires_at=session_expires_at)
+                simulate_response = start_simulation(s, simulation_data)
             
-            if not alpha_id:
+            if simulate_response.status_code // 100 != 2 or 'Location' not in simulate_response.headers:
                 return jsonify({
                     'success': False,
-                    'error': 'Failed to create alpha'
+                    'error': f'Failed to start simulation: {simulate_response.status_code} - {simulate_response.text[:200]}'
                 }), 500
             
-            # Simulate alpha
-            simulation_id = simulate_alpha(s, alpha_id)
+            simulation_id = simulate_response.headers['Location'].rstrip('/').rsplit('/', 1)[-1]
             
             return jsonify({
                 'success': True,
-                'alpha_id': alpha_id,
+                'alpha_id': None,
                 'simulation_id': simulation_id,
                 'message': 'Alpha submitted for backtesting'
             })
         
         except Exception as e:
-            logger.error(f"Error creating/simulating alpha: {e}")
+            logger.error("Error creating/simulating alpha: %s", e)
             return jsonify({
                 'success': False,
                 'error': f'Failed to backtest: {str(e)}'
             }), 500
     
     except Exception as e:
-        logger.error(f"Error in backtest_alpha: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error in backtest_alpha: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -372,115 +812,122 @@ def optimize_alpha():
         api_base_url = data.get('api_base_url', 'http://localhost:11434')
         
         # Build optimization prompt
-        fitness = performance.get('fitness', 'N/A')
-        sharpe = performance.get('sharpe', 'N/A')
-        turnover = performance.get('turnover', 'N/A')
-        returns = performance.get('returns', 'N/A')
-        
-        prompt = f"""You are an expert quantitative analyst. Analyze this alpha and suggest an optimized version.
-
-Original Alpha: {original_expression}
-
-Performance Metrics:
-- Fitness: {fitness}
-- Sharpe: {sharpe}
-- Turnover: {turnover}
-- Returns: {returns}
-
-Problems identified:
-{"- Low Sharpe ratio" if isinstance(sharpe, (int, float)) and sharpe < 1.5 else ""}
-{"- High turnover" if isinstance(turnover, (int, float)) and turnover > 0.3 else ""}
-{"- Low fitness" if isinstance(fitness, (int, float)) and fitness < 1.5 else ""}
-
-Suggest an optimized alpha expression that addresses these issues. Consider:
-1. Adding decay to reduce turnover
-2. Using different time windows
-3. Adding rank/normalization
-4. Using group operations for stability
-5. Combining multiple signals
-
-Output ONLY the optimized alpha expression, no explanation.
-
-Optimized expression:"""
+        prompt = _OPT_PROMPT.format(
+            original_expression=original_expression,
+            fitness=performance.get('fitness', 'N/A'),
+            sharpe=performance.get('sharpe', 'N/A'),
+            turnover=performance.get('turnover', 'N/A'),
+            returns=performance.get('returns', 'N/A'),
+            problems=_identify_problems(performance)
+        )
+
+        if provider not in LLM_PROVIDERS:
+            return jsonify({
+                'success': False,
+                'error': f'Unknown provider: {provider}'
+            }), 400
 
-        # Prepare API request
-        if provider == 'ollama':
-            api_url = f"{api_base_url.rstrip('/')}/v1/chat/completions"
-            headers = {'Content-Type': 'application/json'}
-        elif provider == 'deepseek':
-            api_url = 'https://api.deepseek.com/chat/completions'
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
-        elif provider == 'openai':
-            api_url = f"{api_base_url.rstrip('/')}/chat/completions" if api_base_url else 'https://api.openai.com/v1/chat/completions'
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {api_key}'
-            }
-        
-        api_data = {
-            'model': model,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7,
-            'max_tokens': 500
-        }
-        
-        # Call AI API
-        response = requests.post(api_url, headers=headers, json=api_data, timeout=180)
-        
-        if response.status_code == 200:
-            response_data = response.json()
-            optimized_expression = response_data['choices'][0]['message']['content'].strip()
-            
-            # Clean up the expression
-            optimized_expression = optimized_expression.replace('```', '').replace('`', '').strip()
-            lines = optimized_expression.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('#') and not line.lower().startswith('optimized'):
-                    optimized_expression = line
-                    break
-            
+        temperature, nocache, error = _llm_options(data)
+        if error:
             return jsonify({
-                'success': True,
-                'optimized_expression': optimized_expression
-            })
-        else:
+                'success': False,
+                'error': error
+            }), 400
+
+        try:
+            optimized_expression = _call_llm(
+                provider, model, api_key, api_base_url, prompt,
+                temperature=temperature, nocache=nocache
+            )
+        except LLMAPIError as e:
             return jsonify({
                 'success': False,
-                'error': f'AI API error: {response.status_code}'
+                'error': f'AI API error: {e.status_code}'
             }), 500
+        
+        return jsonify({
+            'success': True,
+            'optimized_expression': optimized_expression
+        })
     
     except Exception as e:
-        logger.error(f"Error in optimize_alpha: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error in optimize_alpha: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+def _simulation_summary(alpha_data):
+    """Extract status and IS performance metrics from an /alphas/{id} payload."""
+    is_data = alpha_data.get('is', {})
+    return {
+        'success': True,
+        'status': alpha_data.get('status'),
+        'performance': {
+            'fitness': is_data.get('fitness'),
+            'sharpe': is_data.get('sharpe'),
+            'turnover': is_data.get('turnover'),
+            'returns': is_data.get('returns'),
+            'margin': is_data.get('margin'),
+            'longCount': is_data.get('longCount'),
+            'shortCount': is_data.get('shortCount')
+        }
+    }
+
+# Alpha and simulation IDs are interpolated into BRAIN URL paths; both are plain alphanumerics
+_BRAIN_ID_RE = re.compile(r'[A-Za-z0-9]+')
+
 @alpha_miner_bp.route('/api/check-simulation', methods=['POST'])
 def check_simulation():
     """Check simulation status and get results"""
     try:
         data = request.json
         alpha_id = data.get('alpha_id')
+        simulation_id = data.get('simulation_id')
         
-        if not alpha_id:
+        if not alpha_id and not simulation_id:
+            return jsonify({
+                'success': False,
+                'error': 'Missing alpha_id or simulation_id'
+            }), 400
+        if simulation_id and not (isinstance(simulation_id, str) and _BRAIN_ID_RE.fullmatch(simulation_id)):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid simulation_id'
+            }), 400
+        if alpha_id and not (isinstance(alpha_id, str) and _BRAIN_ID_RE.fullmatch(alpha_id)):
             return jsonify({
                 'success': False,
-                'error': 'Missing alpha_id'
+                'error': 'Invalid alpha_id'
             }), 400
 
         # Create session from config
         s = create_brain_session()
         
+        if simulation_id:
+            sim_response = brain_get(s, f'https://api.worldquantbrain.com/simulations/{simulation_id}')
+            if sim_response.status_code != 200:
+                return jsonify({
+                    'success': False,
+                    'error': 'Failed to fetch simulation progress'
+                }), 500
+            # BRAIN keeps sending Retry-After until the simulation has finished
+            if 'Retry-After' in sim_response.headers:
+                return jsonify({
+                    'success': True,
+                    'status': 'RUNNING'
+                })
+            simulation = sim_response.json()
+            alpha_id = simulation.get('alpha')
+            if simulation.get('status') == 'ERROR' or not alpha_id:
+                return jsonify({
+                    'success': True,
+                    'status': 'ERROR',
+                    'error': simulation.get('message', 'Simulation failed')
+                })
+        
         # Get alpha details
-        alpha_response = s.get(f'https://api.worldquantbrain.com/alphas/{alpha_id}')
+        alpha_response = brain_get(s, f'https://api.worldquantbrain.com/alphas/{alpha_id}')
         
         if alpha_response.status_code != 200:
             return jsonify({
@@ -488,26 +935,75 @@ def check_simulation():
                 'error': 'Failed to fetch alpha details'
             }), 500
         
-        alpha_data = alpha_response.json()
-        is_data = alpha_data.get('is', {})
+        summary = _simulation_summary(alpha_response.json())
+        summary['alpha_id'] = alpha_id
+        if simulation_id:
+            # The alpha itself reports UNSUBMITTED; what the caller polls for is the simulation
+            summary['status'] = 'COMPLETE'
+        return jsonify(summary)
+    
+    except Exception as e:
+        logger.exception("Error in check_simulation: %s", e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Upper bound on alpha IDs per /api/check-simulations request (one BRAIN GET each)
+MAX_SIMULATION_CHECKS = 100
+
+@alpha_miner_bp.route('/api/check-simulations', methods=['POST'])
+def check_simulations():
+    """Check simulation status for several alphas at once"""
+    try:
+        data = request.json
+        alpha_ids = data.get('alpha_ids', [])
+        
+        if not alpha_ids:
+            return jsonify({
+                'success': False,
+                'error': 'Missing alpha_ids'
+            }), 400
+        if not isinstance(alpha_ids, list) or not all(isinstance(a, str) and _BRAIN_ID_RE.fullmatch(a) for a in alpha_ids):
+            return jsonify({
+                'success': False,
+                'error': 'alpha_ids must be a list of alpha ID strings'
+            }), 400
+        if len(alpha_ids) > MAX_SIMULATION_CHECKS:
+            return jsonify({
+                'success': False,
+                'error': f'Too many alpha_ids (max {MAX_SIMULATION_CHECKS})'
+            }), 400
+
+        # One session shared by all lookups
+        s = create_brain_session()
+
+        def check_one(alpha_id):
+            try:
+                alpha_response = brain_get(s, f'https://api.worldquantbrain.com/alphas/{alpha_id}')
+                if alpha_response.status_code != 200:
+                    return {
+                        'success': False,
+                        'error': 'Failed to fetch alpha details'
+                    }
+                return _simulation_summary(alpha_response.json())
+            except Exception as e:
+                logger.error("Error checking alpha %s: %s", alpha_id, e)
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
+
+        with ThreadPoolExecutor(max_workers=min(16, len(alpha_ids))) as executor:
+            results = dict(zip(alpha_ids, executor.map(check_one, alpha_ids)))
         
         return jsonify({
             'success': True,
-            'status': alpha_data.get('status'),
-            'performance': {
-                'fitness': is_data.get('fitness'),
-                'sharpe': is_data.get('sharpe'),
-                'turnover': is_data.get('turnover'),
-                'returns': is_data.get('returns'),
-                'margin': is_data.get('margin'),
-                'longCount': is_data.get('longCount'),
-                'shortCount': is_data.get('shortCount')
-            }
+            'results': results
         })
     
     except Exception as e:
-        logger.error(f"Error in check_simulation: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.exception("Error in check_simulations: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
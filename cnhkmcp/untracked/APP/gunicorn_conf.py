@@ -0,0 +1,34 @@
+"""
+Gunicorn configuration for serving the app with gevent workers (macOS/Linux only)
+
+Every alpha miner endpoint waits on BRAIN or an LLM provider for most of its
+lifetime, so cooperative gevent workers let one process hold many in-flight
+requests instead of pinning a sync worker per request. The gevent worker
+monkey-patches the standard library itself, so requests and the thread pools
+in the blueprints become cooperative without changes to the app.
+
+Usage:
+    pip install gunicorn gevent
+    gunicorn -c gunicorn_conf.py "运行打开我:app"
+"""
+import os
+import sys
+
+# Same rule as app.run(): the app holds BRAIN credentials and has no auth of its own,
+# so refuse to listen on anything but localhost
+bind_host = os.environ.get('BRAIN_BIND_HOST', '127.0.0.1')
+if bind_host not in ('127.0.0.1', 'localhost'):
+    print(f"Refusing to bind to non-localhost address: {bind_host}")
+    sys.exit(1)
+bind = f"{bind_host}:5000"
+
+worker_class = 'gevent'
+# Logged-in BRAIN sessions (brain_sessions) and the alpha miner session/resource
+# caches live in process memory, so a second worker would not see a login made on
+# the first. Keep one process; gevent's worker_connections provides the concurrency.
+workers = 1
+worker_connections = 1000
+
+# LLM calls may take up to 180 seconds; leave headroom before killing a worker
+timeout = 200
+graceful_timeout = 30
@@ -1,91 +1,145 @@
 import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 import json
+import logging
 import time
 from datetime import datetime
 import os
 from pathlib import Path
+from urllib.parse import urljoin
 import getpass
+import hashlib
+import base64
+import codecs
 import sys
 import re
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
+
+# Verbose response dumps (headers, full JSON bodies) are only emitted at DEBUG level
+logger = logging.getLogger(__name__)
 
 # Platform specific imports
 if sys.platform == 'win32':
     import msvcrt
 else:
+    import select
     import tty
     import termios
 
+# orjson parses response bytes directly and is noticeably faster; fall back to the stdlib
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+def _json_of(response):
+    """Decode a JSON response body from its raw bytes"""
+    return _loads(response.content)
+
 def input_with_asterisks(prompt):
     """Cross-platform password input showing asterisks"""
-    print(prompt, end='', flush=True)
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
     password = []
 
     try:
         if sys.platform == 'win32':
-            # Windows: Use msvcrt.getch()
-            while True:
-                char = msvcrt.getch()
-                
-                # Handle Enter key
-                if char in [b'\r', b'\n']:
-                    print()  # New line
-                    break
-                
-                # Handle Backspace
-                elif char == b'\x08':  # Backspace
-                    if password:
-                        password.pop()
-                        # Move cursor back, print space, move cursor back again
-                        print('\b \b', end='', flush=True)
+            # Windows: Use msvcrt.getch(), draining everything already typed/pasted
+            done = False
+            while not done:
+                chars = [msvcrt.getch()]
+                while msvcrt.kbhit():
+                    chars.append(msvcrt.getch())
                 
-                # Handle Ctrl+C
-                elif char == b'\x03':  # Ctrl+C
-                    print()
-                    raise KeyboardInterrupt
-                
-                # Handle printable characters (ASCII)
-                elif 32 <= ord(char) <= 126:  # Printable ASCII range
-                    password.append(char.decode('ascii'))
-                    print('*', end='', flush=True)
-                
-                # Handle extended characters
-                else:
-                    try:
-                        decoded_char = char.decode('utf-8')
-                        if decoded_char.isprintable():
-                            password.append(decoded_char)
-                            print('*', end='', flush=True)
-                    except UnicodeDecodeError:
-                        continue
-        else:
-            # Unix/macOS: Use tty and termios
-            fd = sys.stdin.fileno()
-            old_settings = termios.tcgetattr(fd)
-            try:
-                tty.setraw(fd)
-                while True:
-                    char = sys.stdin.read(1)
-                    
+                echo = []
+                for char in chars:
                     # Handle Enter key
-                    if char in ['\r', '\n']:
-                        print('\r\n', end='', flush=True)
+                    if char in [b'\r', b'\n']:
+                        echo.append('\n')  # New line
+                        done = True
                         break
                     
                     # Handle Backspace
-                    elif char in ['\x7f', '\x08']:
+                    elif char == b'\x08':  # Backspace
                         if password:
                             password.pop()
-                            print('\b \b', end='', flush=True)
+                            # Move cursor back, print space, move cursor back again
+                            echo.append('\b \b')
                     
                     # Handle Ctrl+C
-                    elif char == '\x03':
-                        print('\r\n', end='', flush=True)
+                    elif char == b'\x03':  # Ctrl+C
+                        sys.stdout.write(''.join(echo) + '\n')
+                        sys.stdout.flush()
                         raise KeyboardInterrupt
                     
-                    # Handle printable characters
-                    elif char.isprintable():
-                        password.append(char)
-                        print('*', end='', flush=True)
+                    # Handle printable characters (ASCII)
+                    elif 32 <= ord(char) <= 126:  # Printable ASCII range
+                        password.append(char.decode('ascii'))
+                        echo.append('*')
+                    
+                    # Handle extended characters
+                    else:
+                        try:
+                            decoded_char = char.decode('utf-8')
+                            if decoded_char.isprintable():
+                                password.append(decoded_char)
+                                echo.append('*')
+                        except UnicodeDecodeError:
+                            continue
+                
+                # One write and flush per batch of keystrokes, none if nothing was echoed
+                if echo:
+                    sys.stdout.write(''.join(echo))
+                    sys.stdout.flush()
+        else:
+            # Unix/macOS: Use tty and termios, reading whatever is available in chunks
+            fd = sys.stdin.fileno()
+            old_settings = termios.tcgetattr(fd)
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+            try:
+                tty.setraw(fd)
+                done = False
+                while not done:
+                    select.select([fd], [], [])
+                    data = os.read(fd, 256)
+                    if not data:  # EOF
+                        break
+                    
+                    echo = []
+                    for char in decoder.decode(data):
+                        # Handle Enter key
+                        if char in ['\r', '\n']:
+                            echo.append('\r\n')
+                            done = True
+                            break
+                        
+                        # Handle Backspace
+                        elif char in ['\x7f', '\x08']:
+                            if password:
+                                password.pop()
+                                echo.append('\b \b')
+                        
+                        # Handle Ctrl+C
+                        elif char == '\x03':
+                            sys.stdout.write(''.join(echo) + '\r\n')
+                            sys.stdout.flush()
+                            raise KeyboardInterrupt
+                        
+                        # Handle printable characters
+                        elif char.isprintable():
+                            password.append(char)
+                            echo.append('*')
+                    
+                    # One write and flush per chunk read, none if nothing was echoed
+                    if echo:
+                        sys.stdout.write(''.join(echo))
+                        sys.stdout.flush()
             finally:
                 termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
                 
@@ -97,36 +151,123 @@ def input_with_asterisks(prompt):
 
     return ''.join(password)
 
+# user_config.json lives in the untracked folder, two levels above this file
+USER_CONFIG_PATH = Path(__file__).resolve().parents[2] / 'user_config.json'
+
+# Parsed config files keyed by (path, st_mtime_ns); re-read only when the file changes
+_config_cache = {}
+_config_lock = threading.Lock()
+
+def _read_config(config_path):
+    """Parse a JSON config file, reusing the cached result while its mtime is unchanged"""
+    key = (config_path, os.stat(config_path).st_mtime_ns)
+    with _config_lock:
+        if key not in _config_cache:
+            config = _loads(config_path.read_bytes())
+            # Drop stale entries for this path before caching the new one
+            for stale in [k for k in _config_cache if k[0] == config_path]:
+                del _config_cache[stale]
+            _config_cache[key] = config
+        return _config_cache[key]
+
 def load_user_config():
     """Load user credentials from user_config.json"""
     try:
-        # Look for user_config.json in parent directories
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(os.path.dirname(script_dir))  # Go up to untracked folder
-        config_path = os.path.join(parent_dir, 'user_config.json')
-        
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                credentials = config.get('credentials', {})
-                email = credentials.get('email')
-                password = credentials.get('password')
-                if email and password:
-                    print(f"✅ Loaded credentials for: {email}")
-                    return email, password
-                else:
-                    print("⚠️ Credentials not found in config file")
-                    return None, None
+        if USER_CONFIG_PATH.exists():
+            config = _read_config(USER_CONFIG_PATH)
+            credentials = config.get('credentials', {})
+            email = credentials.get('email')
+            password = credentials.get('password')
+            if email and password:
+                print(f"✅ Loaded credentials for: {email}")
+                return email, password
+            else:
+                print("⚠️ Credentials not found in config file")
+                return None, None
         else:
-            print(f"⚠️ Config file not found: {config_path}")
+            print(f"⚠️ Config file not found: {USER_CONFIG_PATH}")
             return None, None
     except Exception as e:
         print(f"❌ Error loading user config: {e}")
         return None, None
 
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+    def pause(self, seconds):
+        """Drain the bucket and hold off every caller for `seconds` (e.g. after a 429)"""
+        with self.lock:
+            self.tokens = 0
+            self.updated = max(self.updated, time.monotonic() + seconds)
+
+# Every BRAIN API request, from any thread, draws from this bucket (5 req/s, bursts of 10)
+api_limiter = TokenBucket(rate=5, capacity=10)
+
+# Eligibility checks run in parallel; their combined request rate is capped by api_limiter
+ELIGIBILITY_WORKERS = 8
+
+class StaticBasicAuth(HTTPBasicAuth):
+    """HTTP Basic auth whose Authorization header is encoded once, not on every request"""
+
+    def __init__(self, username, password):
+        super().__init__(username, password)
+        token = base64.b64encode(f"{username}:{password}".encode('utf-8')).decode('ascii')
+        self.header = f"Basic {token}"
+
+    def __call__(self, r):
+        r.headers['Authorization'] = self.header
+        return r
+
+def create_session():
+    """Create a requests.Session with a pooled, retrying adapter for the BRAIN API"""
+    s = requests.Session()
+    # Every call goes to api.worldquantbrain.com: one host pool, sized so each parallel
+    # worker keeps its own warm keep-alive connection instead of opening new TLS sessions
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=ELIGIBILITY_WORKERS,
+        pool_block=True,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            # 429 is left to the callers, which pause the shared api_limiter instead
+            status_forcelist=[502, 503, 504],
+            allowed_methods=frozenset(['GET', 'POST']),
+            raise_on_status=False
+        )
+    )
+    s.mount('https://', adapter)
+    s.headers['Connection'] = 'keep-alive'
+    return s
+
+def _authenticate(s):
+    """POST /authentication on an existing session, keeping its connection pool"""
+    api_limiter.acquire()
+    return s.post('https://api.worldquantbrain.com/authentication')
+
 def login(account_choice=None, use_config=True):
     """Login to WorldQuant Brain API"""
-    s = requests.Session()
+    s = create_session()
     
     email = None
     password = None
@@ -164,21 +305,20 @@ def login(account_choice=None, use_config=True):
     
     print(f"Logging in with: {email}")
     
-    # Set basic auth
-    s.auth = (email, password)
+    # Set basic auth (kept on the session so requests skips its per-request .netrc lookup)
+    s.auth = StaticBasicAuth(email, password)
     
     try:
         # Send authentication request
-        response = s.post('https://api.worldquantbrain.com/authentication')
+        response = _authenticate(s)
         print(f"Login response status: {response.status_code}")
-        print(f"Login response headers: {dict(response.headers)}")
+        logger.debug("Login response headers: %s", response.headers)
         
-        if response.text:
+        if response.text and logger.isEnabledFor(logging.DEBUG):
             try:
-                response_json = response.json()
-                print(f"Login response body: {json.dumps(response_json, indent=2)}")
+                logger.debug("Login response body: %s", json.dumps(_json_of(response), indent=2))
             except json.JSONDecodeError:
-                print(f"Login response body (not JSON): {response.text}")
+                logger.debug("Login response body (not JSON): %s", response.text)
         
         response.raise_for_status()
         print("Login successful!")
@@ -193,14 +333,16 @@ def login(account_choice=None, use_config=True):
 def check_alpha_exists(s, alpha_id):
     """Check if an alpha exists by making a GET request to /alphas/<alpha_id>"""
     try:
+        api_limiter.acquire()
         response = s.get(f"https://api.worldquantbrain.com/alphas/{alpha_id}")
         print(f"Alpha check response status: {response.status_code}")
-        print(f"Alpha check response headers: {dict(response.headers)}")
+        logger.debug("Alpha check response headers: %s", response.headers)
         
         if response.status_code == 200:
-            alpha_data = response.json()
+            alpha_data = _json_of(response)
             print(f"✅ Alpha {alpha_id} exists - Type: {alpha_data.get('type', 'Unknown')}")
-            print(f"Alpha data: {json.dumps(alpha_data, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Alpha data: %s", json.dumps(alpha_data, indent=2))
             return True, alpha_data
         elif response.status_code == 404:
             print(f"❌ Alpha {alpha_id} does not exist (404 Not Found)")
@@ -219,122 +361,269 @@ def check_alpha_exists(s, alpha_id):
             print(f"Error response body: {e.response.text}")
         return False, None
 
-def get_user_alphas(s, limit=1000):
-    """Get all alphas for the current user"""
+def get_user_alphas(s, limit=1000, status=None):
+    """Get all alphas for the current user, optionally filtered server-side by status"""
     try:
         all_alphas = []
         offset = 0
-        page_size = 100
+        page_size = 100  # BRAIN caps list pages at 100 results
+        throttled = 0
         
         while True:
-            url = f"https://api.worldquantbrain.com/alphas?limit={page_size}&offset={offset}"
-            response = s.get(url)
+            params = {'limit': page_size, 'offset': offset}
+            if status:
+                params['status'] = status
+            api_limiter.acquire()
+            response = s.get("https://api.worldquantbrain.com/users/self/alphas", params=params)
             
+            if response.status_code == 429 and throttled < MAX_CONNECTION_RETRIES:
+                # Throttled: pause every thread sharing the limiter, then refetch this page
+                throttled += 1
+                wait_for_rate_limit(response)
+                continue
             if response.status_code != 200:
                 print(f"⚠️ Failed to fetch alphas: {response.status_code}")
                 break
             
-            data = response.json()
+            data = _json_of(response)
             results = data.get('results', [])
             
             if not results:
                 break
             
             all_alphas.extend(results)
-            print(f"📋 Fetched {len(results)} alphas (total: {len(all_alphas)})...")
+            total = min(data.get('count', limit), limit)
+            print(f"📋 Fetched {len(results)} alphas (total: {len(all_alphas)}/{total})...")
             
-            if len(results) < page_size or len(all_alphas) >= limit:
+            if len(results) < page_size or len(all_alphas) >= total:
                 break
             
             offset += page_size
-            time.sleep(0.5)  # Be nice to the API
+            wait_for_rate_limit(response)
         
         print(f"✅ Total alphas fetched: {len(all_alphas)}")
-        return all_alphas
+        return all_alphas[:limit]
     except Exception as e:
         print(f"❌ Error fetching user alphas: {e}")
         return []
 
+# Longest the shared limiter is paused on a rate-limit header; guards against
+# X-RateLimit-Reset values that are epoch timestamps rather than seconds
+MAX_RATE_LIMIT_PAUSE = 60  # seconds
+
+def _header_number(response, name):
+    """Return a numeric header value, or None if it is missing or malformed"""
+    try:
+        return float(response.headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def wait_for_rate_limit(response):
+    """Pause the shared limiter only when the API says the rate-limit budget is (nearly) exhausted"""
+    retry_after = _header_number(response, 'Retry-After')
+    if retry_after is not None:
+        api_limiter.pause(min(max(retry_after, 0), MAX_RATE_LIMIT_PAUSE))
+        return
+    remaining = _header_number(response, 'X-RateLimit-Remaining')
+    if remaining is not None and remaining < 2:
+        reset = _header_number(response, 'X-RateLimit-Reset')
+        if reset is None:
+            reset = 1
+        elif reset > time.time() - 86400:
+            # An epoch timestamp rather than a number of seconds
+            reset -= time.time()
+        api_limiter.pause(min(max(reset, 0), MAX_RATE_LIMIT_PAUSE))
+
+# On-disk cache of the last fetched alpha list, one file per account
+ALPHA_CACHE_TTL = 300  # seconds
+
+def _account_digest(email):
+    """Short stable identifier for per-account files, without putting the email in the name"""
+    return hashlib.sha1(email.encode('utf-8')).hexdigest()[:16]
+
+def _alpha_cache_path(email):
+    """Per-account cache file in the user's home directory"""
+    return Path.home() / f".wq_alpha_cache_{_account_digest(email)}.json"
+
+def load_cached_alphas(email):
+    """Return the cached alpha list if it is younger than ALPHA_CACHE_TTL, else None"""
+    try:
+        with open(_alpha_cache_path(email), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if time.time() - cached['ts'] < ALPHA_CACHE_TTL:
+            return cached['alphas']
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def save_cached_alphas(email, alphas):
+    """Write the alpha list to the per-account cache file"""
+    try:
+        with open(_alpha_cache_path(email), 'w', encoding='utf-8') as f:
+            json.dump({'ts': time.time(), 'alphas': alphas}, f)
+    except OSError as e:
+        print(f"⚠️ Could not write alpha cache: {e}")
+
+def clear_cached_alphas(email):
+    """Forget the cached alpha list, e.g. after submissions changed alpha statuses"""
+    try:
+        _alpha_cache_path(email).unlink()
+    except OSError:
+        pass
+
+# Alpha IDs known to be submitted, persisted per account so later scans skip them
+def _submitted_ids_path(email):
+    """Per-account file of submitted alpha IDs in the user's home directory"""
+    return Path.home() / f".wq_submitted_{_account_digest(email)}.json"
+
+def load_submitted_ids(email):
+    """Return the set of alpha IDs recorded as submitted for this account"""
+    try:
+        return set(_loads(_submitted_ids_path(email).read_bytes()))
+    except (OSError, ValueError, TypeError):
+        return set()
+
+def save_submitted_ids(email, submitted_ids):
+    """Write the submitted alpha IDs to the per-account file"""
+    try:
+        with open(_submitted_ids_path(email), 'w', encoding='utf-8') as f:
+            json.dump(sorted(submitted_ids), f)
+    except OSError as e:
+        print(f"⚠️ Could not write submitted alpha IDs: {e}")
+
+
 def check_submission_eligibility(s, alpha_id):
-    """Check if an alpha is eligible for submission and return the check results"""
+    """Check if an alpha is eligible for submission and return (alpha_id, check results)"""
     try:
-        response = s.post(f"https://api.worldquantbrain.com/alphas/{alpha_id}/submit")
+        for _ in range(MAX_CONNECTION_RETRIES):
+            api_limiter.acquire()
+            response = s.post(f"https://api.worldquantbrain.com/alphas/{alpha_id}/submit")
+            if response.status_code != 429:
+                break
+            # Throttled: pause every thread sharing the limiter, then try again
+            wait_for_rate_limit(response)
         
         if response.status_code == 200:
-            data = response.json()
-            return data
+            data = _json_of(response)
+            return alpha_id, data
         else:
-            return None
+            return alpha_id, None
     except Exception as e:
         print(f"Error checking {alpha_id}: {e}")
-        return None
+        return alpha_id, None
+
+_check_fields = itemgetter('name', 'result')
 
-def filter_eligible_alphas(s, alphas, verbose=False):
-    """Filter alphas to find those eligible for submission"""
+def parse_checks(checks, stop_on_fail=False):
+    """Return (already_submitted, fail_reasons) for a list of IS check results"""
+    fail_reasons = []
+    for check in checks:
+        name, result = _check_fields(check)
+        if name == 'ALREADY_SUBMITTED':
+            return True, []
+        elif result == 'FAIL':
+            fail_reasons.append(f"{name}: limit={check.get('limit', 'N/A')}, value={check.get('value', 'N/A')}")
+            if stop_on_fail:
+                break
+    return False, fail_reasons
+
+def filter_eligible_alphas(s, alphas, verbose=False, submitted_ids=None):
+    """Filter alphas to find those eligible for submission
+
+    Alphas in submitted_ids are skipped without a request; alphas found to be
+    already submitted are added to it.
+    """
+    if submitted_ids is None:
+        submitted_ids = set()
     eligible = []
     already_submitted = []
     failed_checks = []
     
-    print(f"\n🔍 Checking {len(alphas)} alphas for submission eligibility...\n")
+    alphas_by_id = {alpha['id']: alpha for alpha in alphas if alpha.get('id')}
     
-    for i, alpha in enumerate(alphas, 1):
-        alpha_id = alpha.get('id')
-        if not alpha_id:
-            continue
-        
-        if verbose:
-            print(f"[{i}/{len(alphas)}] Checking alpha {alpha_id}...", end=" ")
-        else:
-            if i % 10 == 0:
-                print(f"Progress: {i}/{len(alphas)}...")
-        
-        check_result = check_submission_eligibility(s, alpha_id)
-        
-        if not check_result:
-            if verbose:
-                print("❌ Failed to check")
+    # The alpha list payload already carries status and IS checks, so alphas that are
+    # submitted or already failing are classified without a per-alpha request
+    to_check = {}
+    for alpha_id, alpha in alphas_by_id.items():
+        if alpha_id in submitted_ids or alpha.get('status', 'UNSUBMITTED') != 'UNSUBMITTED':
+            submitted_ids.add(alpha_id)
+            already_submitted.append({
+                'id': alpha_id,
+                'alpha': alpha,
+                'reason': 'Already submitted'
+            })
             continue
-        
-        # Parse the check results
-        is_eligible = True
-        fail_reasons = []
-        
-        if 'is' in check_result and 'checks' in check_result['is']:
-            for check in check_result['is']['checks']:
-                if check['name'] == 'ALREADY_SUBMITTED':
-                    is_eligible = False
-                    already_submitted.append({
-                        'id': alpha_id,
-                        'alpha': alpha,
-                        'reason': 'Already submitted'
-                    })
-                    if verbose:
-                        print("⚪ Already submitted")
-                    break
-                elif check['result'] == 'FAIL':
-                    is_eligible = False
-                    reason = f"{check['name']}: limit={check.get('limit', 'N/A')}, value={check.get('value', 'N/A')}"
-                    fail_reasons.append(reason)
-        
-        if is_eligible:
-            eligible.append({
+        is_submitted, fail_reasons = parse_checks((alpha.get('is') or {}).get('checks', []))
+        if is_submitted:
+            submitted_ids.add(alpha_id)
+            already_submitted.append({
                 'id': alpha_id,
                 'alpha': alpha,
-                'check_result': check_result
+                'reason': 'Already submitted'
             })
-            if verbose:
-                print("✅ Eligible")
         elif fail_reasons:
             failed_checks.append({
                 'id': alpha_id,
                 'alpha': alpha,
                 'reasons': fail_reasons
             })
-            if verbose:
-                print(f"❌ Failed: {', '.join(fail_reasons)}")
+        else:
+            to_check[alpha_id] = alpha
+    
+    print(f"\n🔍 Checking {len(to_check)} of {len(alphas)} alphas for submission eligibility...\n")
+    
+    with ThreadPoolExecutor(max_workers=ELIGIBILITY_WORKERS) as executor:
+        futures = [executor.submit(check_submission_eligibility, s, alpha_id) for alpha_id in to_check]
         
-        # Be nice to the API
-        time.sleep(0.3)
+        for i, future in enumerate(as_completed(futures), 1):
+            alpha_id, check_result = future.result()
+            alpha = to_check[alpha_id]
+            
+            if verbose:
+                print(f"[{i}/{len(to_check)}] Checked alpha {alpha_id}...", end=" ")
+            else:
+                if i % 10 == 0:
+                    print(f"Progress: {i}/{len(to_check)}...")
+            
+            if not check_result:
+                if verbose:
+                    print("❌ Failed to check")
+                continue
+            
+            # Parse the check results
+            is_submitted, fail_reasons = parse_checks((check_result.get('is') or {}).get('checks', []))
+            is_eligible = not is_submitted and not fail_reasons
+            
+            if is_submitted:
+                submitted_ids.add(alpha_id)
+                already_submitted.append({
+                    'id': alpha_id,
+                    'alpha': alpha,
+                    'reason': 'Already submitted'
+                })
+                if verbose:
+                    print("⚪ Already submitted")
+            elif is_eligible:
+                eligible.append({
+                    'id': alpha_id,
+                    'alpha': alpha,
+                    'check_result': check_result
+                })
+                if verbose:
+                    print("✅ Eligible")
+            elif fail_reasons:
+                failed_checks.append({
+                    'id': alpha_id,
+                    'alpha': alpha,
+                    'reasons': fail_reasons
+                })
+                if verbose:
+                    print(f"❌ Failed: {', '.join(fail_reasons)}")
+    
+    # Checks finish out of order; report alphas in the order they were fetched
+    position = {alpha_id: i for i, alpha_id in enumerate(alphas_by_id)}
+    for group in (eligible, already_submitted, failed_checks):
+        group.sort(key=lambda item: position[item['id']])
     
     print(f"\n📊 Summary:")
     print(f"   ✅ Eligible for submission: {len(eligible)}")
@@ -346,14 +635,16 @@ def filter_eligible_alphas(s, alphas, verbose=False):
 def get_alpha_recordsets(s, alpha_id):
     """Get available record sets for an alpha"""
     try:
+        api_limiter.acquire()
         response = s.get(f"https://api.worldquantbrain.com/alphas/{alpha_id}/recordsets")
         print(f"Recordsets response status: {response.status_code}")
-        print(f"Recordsets response headers: {dict(response.headers)}")
+        logger.debug("Recordsets response headers: %s", response.headers)
         
         if response.status_code == 200:
-            recordsets_data = response.json()
+            recordsets_data = _json_of(response)
             print(f"📊 Alpha {alpha_id} has {recordsets_data.get('count', 0)} record sets available")
-            print(f"Recordsets data: {json.dumps(recordsets_data, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Recordsets data: %s", json.dumps(recordsets_data, indent=2))
             return recordsets_data
         else:
             print(f"⚠️ Could not fetch record sets for alpha {alpha_id}: {response.status_code}")
@@ -367,38 +658,78 @@ def get_alpha_recordsets(s, alpha_id):
             print(f"Error response body: {e.response.text}")
         return None
 
+# Connection errors during a submit are retried with exponential backoff (capped at 60s)
+MAX_CONNECTION_RETRIES = 6
+
+# Failed submits are retried with decorrelated jitter so parallel workers don't retry in lockstep
+MAX_SUBMIT_ATTEMPTS = 8
+SUBMIT_RETRY_BASE = 3  # seconds
+SUBMIT_RETRY_CAP = 300  # seconds
+# Wait used when Retry-After is not a number of seconds (e.g. an HTTP date)
+DEFAULT_RETRY_AFTER = 5  # seconds
+
 def submit(s, alpha_id):
-    """Submit a single alpha with retry logic - keeps trying until success"""
+    """Submit a single alpha, retrying failures with jittered backoff up to MAX_SUBMIT_ATTEMPTS"""
     
     def submit_inner(s, alpha_id):
-        """Inner submit function with rate limiting handling"""
-        try:
-            result = s.post(f"https://api.worldquantbrain.com/alphas/{alpha_id}/submit")
-            print(f"Alpha submit, alpha_id={alpha_id}, status_code={result.status_code}")
-            print(f"Response headers: {dict(result.headers)}")
-            
-            # Handle rate limiting
-            while True:
-                if "retry-after" in result.headers:
-                    wait_time = float(result.headers["Retry-After"])
-                    print(f"Rate limited, waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    result = s.get(f"https://api.worldquantbrain.com/alphas/{alpha_id}/submit")
+        """Inner submit function with rate limiting, re-auth and connection retry handling"""
+        url = f"https://api.worldquantbrain.com/alphas/{alpha_id}/submit"
+        
+        for attempt in range(MAX_CONNECTION_RETRIES):
+            try:
+                api_limiter.acquire()
+                result = s.post(url)
+                print(f"Alpha submit, alpha_id={alpha_id}, status_code={result.status_code}")
+                logger.debug("Response headers: %s", result.headers)
+                
+                # Session expired: re-authenticate in place and try once more
+                if result.status_code == 401:
+                    print("Session expired, re-authenticating...")
+                    auth_response = _authenticate(s)
+                    if auth_response.status_code not in (200, 201):
+                        print(f"❌ Re-authentication failed, status_code={auth_response.status_code}")
+                        return None
+                    api_limiter.acquire()
+                    result = s.post(url)
+                    print(f"Alpha submit after re-auth, alpha_id={alpha_id}, status_code={result.status_code}")
+                
+                # Rate limited or still processing: wait as told, then poll the job's
+                # Location if the server gave one, otherwise the submit URL
+                poll_url = url
+                while "retry-after" in result.headers:
+                    if "location" in result.headers:
+                        poll_url = urljoin(url, result.headers["Location"])
+                    wait_time = _header_number(result, "Retry-After")
+                    if wait_time is None:
+                        wait_time = DEFAULT_RETRY_AFTER
+                    wait_time = min(max(wait_time, 0), MAX_RATE_LIMIT_PAUSE)
+                    if result.status_code == 429:
+                        # Throttled: hold off every thread sharing the limiter, not just this one
+                        print(f"Rate limited, waiting {wait_time} seconds...")
+                        api_limiter.pause(wait_time)
+                    else:
+                        # Submission still being processed; poll again when asked to
+                        time.sleep(wait_time)
+                    api_limiter.acquire()
+                    result = s.get(poll_url)
                     print(f"Retry GET response, status_code={result.status_code}")
-                    print(f"Retry headers: {dict(result.headers)}")
-                else:
-                    break
-            
-            return result
-        except Exception as e:
-            print(f'Connection error: {e}, attempting to re-login...')
-            new_session = login()
-            if new_session is None:
+                    logger.debug("Retry headers: %s", result.headers)
+                
+                return result
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                wait_time = min(60, 2 ** attempt)
+                print(f'Connection error: {e}, retrying in {wait_time} seconds...')
+                time.sleep(wait_time)
+            except requests.exceptions.RequestException as e:
+                print(f'Request error: {e}')
                 return None
-            return submit_inner(new_session, alpha_id)
+        
+        print(f"❌ Giving up on {alpha_id} after {MAX_CONNECTION_RETRIES} connection errors")
+        return None
     
     attempt_count = 1
     result = None
+    wait_time = SUBMIT_RETRY_BASE
     
     while True:
         print(f"Submit attempt {attempt_count} for alpha {alpha_id}")
@@ -414,15 +745,27 @@ def submit(s, alpha_id):
         elif result.status_code == 403:
             print(f"❌ Alpha {alpha_id} submit forbidden, status_code={result.status_code}")
             return result
+        elif result.status_code == 404:
+            print(f"❌ Alpha {alpha_id} not found, status_code={result.status_code}")
+            return result
         else:
             print(f"⚠️ Alpha submit fail, status_code={result.status_code}, alpha_id={alpha_id}, attempt {attempt_count}")
-            print(f"Waiting 2 minutes before retry...")
-            time.sleep(120)  # 2 minutes = 120 seconds
+            if attempt_count >= MAX_SUBMIT_ATTEMPTS:
+                print(f"❌ Giving up on {alpha_id} after {attempt_count} attempts")
+                return result
+            # Decorrelated jitter; submit_inner has already waited out any Retry-After
+            wait_time = min(SUBMIT_RETRY_CAP, random.uniform(1, wait_time * 3))
+            print(f"Waiting {wait_time:.0f} seconds before retry...")
+            time.sleep(wait_time)
             attempt_count += 1
             continue
 
-def submit_alpha(alpha_id, session=None, account_choice=None):
-    """Submit a single alpha with comprehensive error handling"""
+def submit_alpha(alpha_id, session=None, account_choice=None, verify_exists=False):
+    """Submit a single alpha with comprehensive error handling
+
+    A missing alpha is reported from the submit response's 404, so the extra
+    GET /alphas/<id> pre-check only runs when verify_exists is set.
+    """
     if session is None:
         s = login(account_choice)
         if s is None:
@@ -430,12 +773,12 @@ def submit_alpha(alpha_id, session=None, account_choice=None):
     else:
         s = session
     
-    # First check if the alpha exists
-    print(f"Checking if alpha {alpha_id} exists...")
-    exists, alpha_data = check_alpha_exists(s, alpha_id)
-    if not exists:
-        print(f"❌ Cannot submit alpha {alpha_id} - it does not exist")
-        return False
+    if verify_exists:
+        print(f"Checking if alpha {alpha_id} exists...")
+        exists, alpha_data = check_alpha_exists(s, alpha_id)
+        if not exists:
+            print(f"❌ Cannot submit alpha {alpha_id} - it does not exist")
+            return False
     
     # Submit the alpha
     res = submit(s, alpha_id)
@@ -444,10 +787,14 @@ def submit_alpha(alpha_id, session=None, account_choice=None):
         print(f"Failed to submit {alpha_id} - connection error")
         return False
     
+    if res.status_code == 404:
+        print(f"❌ Cannot submit alpha {alpha_id} - it does not exist")
+        return False
+    
     # Parse response
     if res.text:
         try:
-            res_json = res.json()
+            res_json = _json_of(res)
             print(f"Submit response parsed successfully")
         except json.JSONDecodeError:
             print(f"Submit response is not JSON: {res.text[:200]}...")
@@ -462,19 +809,16 @@ def submit_alpha(alpha_id, session=None, account_choice=None):
         return False
     
     # Check submission status
-    submitted = True
-    if 'is' in res_json and 'checks' in res_json['is']:
-        for item in res_json['is']['checks']:
-            if item['name'] == 'ALREADY_SUBMITTED':
-                submitted = False
-                print(f"{alpha_id} - Already submitted")
-                break
-            if item['result'] == 'FAIL':
-                submitted = False
-                print(f"{alpha_id} - {item['name']} check failed, limit = {item['limit']}, value = {item['value']}")
-                break
+    is_submitted, fail_reasons = parse_checks((res_json.get('is') or {}).get('checks', ()), stop_on_fail=True)
+    if is_submitted:
+        print(f"{alpha_id} - Already submitted")
+    elif fail_reasons:
+        print(f"{alpha_id} - Check failed: {fail_reasons[0]}")
+    elif res.status_code != 200:
+        print(f"{alpha_id} - Submission failed, status_code={res.status_code}")
+        return False
     
-    if submitted:
+    if not is_submitted and not fail_reasons:
         print(f'{alpha_id} - Submission successful!')
         return True
     else:
@@ -509,15 +853,31 @@ def batch_submit_alphas(session, alpha_ids):
         print(f"\n📊 Progress: {i}/{len(alpha_ids)} processed | "
               f"✅ {len(results['success'])} succeeded | "
               f"❌ {len(results['failed'])} failed")
-        
-        # Brief pause between submissions
-        if i < len(alpha_ids):
-            time.sleep(1)
     
     return results
 
+# One comma-separated part of a menu selection: "3" or "1-10"
+_SELECTION_RE = re.compile(r'^\s*(\d+)\s*(?:-\s*(\d+))?\s*$')
+
+def parse_selection(selection, count):
+    """Parse a selection like "1,3,5-10" into sorted, unique 1-based indices within 1..count"""
+    selected_indices = set()
+    for part in selection.split(','):
+        match = _SELECTION_RE.match(part)
+        if not match:
+            raise ValueError(f"invalid selection part: {part.strip()!r}")
+        start = int(match[1])
+        end = int(match[2] or start)
+        # Clamp to the valid range so huge ranges don't materialize
+        selected_indices.update(range(max(start, 1), min(end, count) + 1))
+    return sorted(selected_indices)
+
 def main():
     """Main function to run the alpha submission script"""
+    # --debug (or ALPHA_SUBMITTER_DEBUG=1) shows the DEBUG-level response dumps
+    if '--debug' in sys.argv[1:] or os.environ.get('ALPHA_SUBMITTER_DEBUG'):
+        logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    
     print("="*70)
     print("🎯 WorldQuant Brain Alpha Submitter - Auto Filter & Submit")
     print("="*70)
@@ -536,31 +896,42 @@ def main():
         return
     
     print("\n✅ Login successful!\n")
+    submitted_ids = load_submitted_ids(session.auth.username)
     
     while True:
         print("\n" + "="*70)
         print("📋 Main Menu")
         print("="*70)
-        print("1. Auto-scan and filter eligible alphas")
+        print("1. Auto-scan and filter eligible alphas (1R to re-fetch the alpha list)")
         print("2. Manual submit (enter alpha ID)")
         print("3. Check alpha info")
         print("4. Re-login")
         print("5. Exit")
         print("="*70)
         
-        choice = input("\nSelect option (1-5): ").strip()
+        choice = input("\nSelect option (1-5): ").strip().upper()
         
-        if choice == '1':
-            # Auto-scan mode
-            print("\n🔄 Fetching your alphas...")
-            alphas = get_user_alphas(session)
+        if choice in ('1', '1R'):
+            # Auto-scan mode, reusing a recent alpha list unless a refresh was asked for
+            email = session.auth.username
+            alphas = None if choice == '1R' else load_cached_alphas(email)
+            if alphas is None:
+                print("\n🔄 Fetching your alphas...")
+                alphas = get_user_alphas(session, status='UNSUBMITTED')
+                if alphas:
+                    save_cached_alphas(email, alphas)
+            else:
+                print(f"\n📦 Using {len(alphas)} alphas cached in the last {ALPHA_CACHE_TTL // 60} minutes (1R to re-fetch)")
             
             if not alphas:
                 print("❌ No alphas found or failed to fetch.")
                 continue
             
             # Filter eligible alphas
-            eligible, already_submitted, failed = filter_eligible_alphas(session, alphas, verbose=False)
+            eligible, already_submitted, failed = filter_eligible_alphas(
+                session, alphas, verbose=False, submitted_ids=submitted_ids
+            )
+            save_submitted_ids(email, submitted_ids)
             
             if not eligible:
                 print("\n⚠️ No eligible alphas found for submission.")
@@ -597,6 +968,9 @@ def main():
                 
                 if confirm == 'yes':
                     results = batch_submit_alphas(session, alpha_ids)
+                    clear_cached_alphas(email)
+                    submitted_ids.update(results['success'])
+                    save_submitted_ids(email, submitted_ids)
                     print("\n" + "="*70)
                     print("🎉 Batch Submission Complete!")
                     print("="*70)
@@ -617,21 +991,8 @@ def main():
                 selection = input("\nEnter alpha numbers (e.g., 1,3,5 or 1-10): ").strip()
                 
                 try:
-                    selected_indices = set()
-                    
-                    # Parse selection
-                    for part in selection.split(','):
-                        part = part.strip()
-                        if '-' in part:
-                            # Range like 1-10
-                            start, end = map(int, part.split('-'))
-                            selected_indices.update(range(start, end + 1))
-                        else:
-                            # Single number
-                            selected_indices.add(int(part))
-                    
-                    # Get selected alpha IDs
-                    alpha_ids = [eligible[i-1]['id'] for i in selected_indices if 1 <= i <= len(eligible)]
+                    # Get selected alpha IDs, in list order
+                    alpha_ids = [eligible[i - 1]['id'] for i in parse_selection(selection, len(eligible))]
                     
                     if not alpha_ids:
                         print("❌ No valid alphas selected.")
@@ -642,6 +1003,9 @@ def main():
                     
                     if confirm == 'yes':
                         results = batch_submit_alphas(session, alpha_ids)
+                        clear_cached_alphas(email)
+                        submitted_ids.update(results['success'])
+                        save_submitted_ids(email, submitted_ids)
                         print("\n" + "="*70)
                         print("🎉 Batch Submission Complete!")
                         print("="*70)
@@ -675,10 +1039,13 @@ def main():
             print(f"\n📤 Submitting alpha: {alpha_id}")
             print("=" * 60)
             
-            success = submit_alpha(alpha_id, session)
+            success = submit_alpha(alpha_id, session, verify_exists=True)
             
             if success:
                 print(f"✅ Alpha {alpha_id} submitted successfully!")
+                clear_cached_alphas(session.auth.username)
+                submitted_ids.add(alpha_id)
+                save_submitted_ids(session.auth.username, submitted_ids)
             else:
                 print(f"❌ Alpha {alpha_id} failed to submit.")
             
@@ -720,6 +1087,8 @@ def main():
                 print("❌ Failed to login. Exiting.")
                 return
             print("✅ Login successful!")
+            # The account may have changed; use its own submitted-ID record
+            submitted_ids = load_submitted_ids(session.auth.username)
         
         elif choice == '5':
             # Exit
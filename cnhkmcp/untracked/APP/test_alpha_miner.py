@@ -1,138 +1,272 @@
 """
 测试 alpha_miner 模块的功能
+
+直接运行: python test_alpha_miner.py
+用 pytest 运行: pytest test_alpha_miner.py (装了 pytest-xdist 时可加 -n auto 并行)
 """
 import sys
 import os
+import json
+import traceback
+import weakref
+import time
+from pathlib import Path
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# pytest 只在以 pytest 方式运行时需要; 直接运行脚本时可以没有
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+# 可选依赖: 安装了 ijson 时流式解析 /data-sets 响应, 否则整体解析
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 可选依赖: 安装了 orjson 时直接从响应字节解析 JSON, 比标准库更快
+try:
+    import orjson
+
+    def _fast_json(response):
+        return orjson.loads(response.content)
+except ImportError:
+    def _fast_json(response):
+        return response.json()
+
+# Add current directory to path (once, even if this module is imported again)
+_HERE = str(Path(__file__).resolve().parent)
+if _HERE not in sys.path:
+    sys.path.insert(0, _HERE)
+
+from blueprints.alpha_miner import load_user_config_credentials, create_brain_session, SESSION_TTL
+
+# 登录后的 cookies 缓存在本地, 有效期内再次运行测试时跳过登录
+SESSION_CACHE_PATH = Path.home() / '.cache' / 'alpha_miner' / 'session.json'
+
+# 各测试的标题横幅
+SEP = "=" * 50
+BANNER_TEST1 = f"{SEP}\n测试1: 读取用户配置\n{SEP}"
+BANNER_TEST2 = f"\n{SEP}\n测试2: BRAIN API 认证\n{SEP}"
+BANNER_TEST3 = f"\n{SEP}\n测试3: 获取 Datasets\n{SEP}"
+BANNER_TEST4 = f"\n{SEP}\n测试4: 获取用户信息\n{SEP}"
+BANNER_START = f"\n{SEP}\nAlpha Miner 模块测试\n{SEP}\n"
+BANNER_DONE = f"\n{SEP}\n测试完成\n{SEP}"
+
+DATASETS_URL = 'https://api.worldquantbrain.com/data-sets'
 
-# Add current directory to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+USER_SELF_URL = 'https://api.worldquantbrain.com/users/self'
 
-from blueprints.alpha_miner import load_user_config_credentials, create_brain_session
+# 验证缓存 cookies 时拿到的 /users/self 响应; 用户信息测试直接复用, 省掉一次往返
+_validated_profiles = weakref.WeakKeyDictionary()
 
-def test_config():
+# (连接, 读取) 超时, 避免接口卡住时测试永远挂起
+REQUEST_TIMEOUT = (3.05, 15)
+
+def tune_session(session):
+    """所有请求都发往同一个主机: 挂载单主机连接池, 让各测试复用同一个 keep-alive TLS 连接"""
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True
+        )
+    )
+    session.mount('https://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+def get_or_create_session():
+    """优先复用缓存的 cookies (用 /users/self 验证), 失效时才重新登录并写入缓存
+
+    返回的 session 已挂好连接池; 验证请求建立的连接会被后续测试直接复用
+    """
+    try:
+        if time.time() - SESSION_CACHE_PATH.stat().st_mtime < SESSION_TTL:
+            session = tune_session(requests.Session())
+            session.cookies = requests.utils.cookiejar_from_dict(json.loads(SESSION_CACHE_PATH.read_text(encoding='utf-8')))
+            response = session.get(USER_SELF_URL, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                _validated_profiles[session] = response
+                return session
+    except (OSError, ValueError, requests.exceptions.RequestException):
+        pass
+    
+    session = tune_session(create_brain_session())
+    try:
+        SESSION_CACHE_PATH.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # 文件里是 BRAIN 登录 cookies: 只允许当前用户读写
+        fd = os.open(SESSION_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(SESSION_CACHE_PATH, 0o600)  # 文件已存在时 os.open 不会改权限
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(requests.utils.dict_from_cookiejar(session.cookies), f)
+    except OSError:
+        pass
+    return session
+
+def check_config(out=print):
     """测试配置读取"""
-    print("=" * 50)
-    print("测试1: 读取用户配置")
-    print("=" * 50)
+    out(BANNER_TEST1)
     
     email, password = load_user_config_credentials()
     
     if email and password:
-        print(f"✓ 成功读取配置")
-        print(f"  Email: {email}")
-        print(f"  Password: {'*' * len(password)}")
+        out(f"✓ 成功读取配置")
+        out(f"  Email: {email}")
+        out(f"  Password: {'*' * len(password)}")
         return True
     else:
-        print("✗ 配置读取失败")
+        out("✗ 配置读取失败")
         return False
 
-def test_authentication():
+def check_authentication(out=print):
     """测试认证"""
-    print("\n" + "=" * 50)
-    print("测试2: BRAIN API 认证")
-    print("=" * 50)
+    out(BANNER_TEST2)
     
     try:
-        session = create_brain_session()
-        print(f"✓ 认证成功")
-        print(f"  Session对象: {session}")
+        session = get_or_create_session()
+        out(f"✓ 认证成功")
+        out(f"  Session对象: {session}")
         return session
     except Exception as e:
-        print(f"✗ 认证失败: {e}")
+        out(f"✗ 认证失败: {e}")
         return None
 
-def test_get_datasets(session):
+def check_get_datasets(session, out=print):
     """测试获取datasets"""
-    print("\n" + "=" * 50)
-    print("测试3: 获取 Datasets")
-    print("=" * 50)
-    
-    if not session:
-        print("✗ 没有有效的session，跳过测试")
-        return False
+    out(BANNER_TEST3)
     
     try:
-        response = session.get('https://api.worldquantbrain.com/data-sets', params={'limit': 5})
-        print(f"  HTTP状态码: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            datasets = data.get('results', [])
-            print(f"✓ 成功获取数据")
-            print(f"  数据集数量: {len(datasets)}")
-            
-            if datasets:
-                print(f"\n  前3个数据集:")
-                for i, ds in enumerate(datasets[:3], 1):
-                    print(f"    {i}. {ds.get('name', 'Unknown')}")
-                    print(f"       ID: {ds.get('id', 'N/A')}")
+        # 只需要 id 和 name: 请求服务端只返回这两个字段; 不支持 fields 参数时 (400) 退回完整响应
+        response = session.get(DATASETS_URL, params={'limit': 5, 'fields': 'id,name'}, stream=True, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 400:
+            response.close()
+            response = session.get(DATASETS_URL, params={'limit': 5}, stream=True, timeout=REQUEST_TIMEOUT)
+        with closing(response):
+            out(f"  HTTP状态码: {response.status_code}")
+            if response.status_code != 200:
+                out(f"✗ API返回错误: {response.status_code}")
+                out(f"  响应内容: {response.text[:200]}")
+                return False
             
-            return True
-        else:
-            print(f"✗ API返回错误: {response.status_code}")
-            print(f"  响应内容: {response.text[:200]}")
-            return False
+            if ijson is not None:
+                # 边读边解析 results 数组里的每个数据集, 不把整个响应体读入内存
+                response.raw.decode_content = True
+                datasets = list(ijson.items(response.raw, 'results.item'))
+            else:
+                datasets = _fast_json(response).get('results', [])
+        
+        out(f"✓ 成功获取数据")
+        out(f"  数据集数量: {len(datasets)}")
+        
+        if datasets:
+            out(f"\n  前3个数据集:")
+            for i, ds in enumerate(datasets[:3], 1):
+                out(f"    {i}. {ds.get('name', 'Unknown')}")
+                out(f"       ID: {ds.get('id', 'N/A')}")
+        
+        return True
             
     except Exception as e:
-        print(f"✗ 请求失败: {e}")
-        import traceback
-        traceback.print_exc()
+        out(f"✗ 请求失败: {e}")
+        out(traceback.format_exc())
         return False
 
-def test_get_user_profile(session):
+def check_get_user_profile(session, out=print):
     """测试获取用户信息"""
-    print("\n" + "=" * 50)
-    print("测试4: 获取用户信息")
-    print("=" * 50)
-    
-    if not session:
-        print("✗ 没有有效的session，跳过测试")
-        return False
+    out(BANNER_TEST4)
     
     try:
-        response = session.get('https://api.worldquantbrain.com/users/self')
-        print(f"  HTTP状态码: {response.status_code}")
+        response = _validated_profiles.pop(session, None)
+        if response is None:
+            response = session.get(USER_SELF_URL, timeout=REQUEST_TIMEOUT)
+        else:
+            out("  (复用验证 cookies 时的 /users/self 响应)")
+        out(f"  HTTP状态码: {response.status_code}")
         
         if response.status_code == 200:
-            user = response.json()
-            print(f"✓ 成功获取用户信息")
-            print(f"  用户名: {user.get('username', 'N/A')}")
-            print(f"  邮箱: {user.get('email', 'N/A')}")
+            user = _fast_json(response)
+            out(f"✓ 成功获取用户信息")
+            out(f"  用户名: {user.get('username', 'N/A')}")
+            out(f"  邮箱: {user.get('email', 'N/A')}")
             return True
         else:
-            print(f"✗ API返回错误: {response.status_code}")
+            out(f"✗ API返回错误: {response.status_code}")
             return False
             
     except Exception as e:
-        print(f"✗ 请求失败: {e}")
+        out(f"✗ 请求失败: {e}")
         return False
 
+if pytest is not None:
+    @pytest.fixture(scope='session')
+    def session():
+        """整个 pytest 运行共用一个已认证的 session"""
+        s = check_authentication()
+        if not s:
+            pytest.skip("BRAIN 认证失败")
+        return s
+
+    def test_config():
+        assert check_config()
+
+    def test_get_datasets(session):
+        assert check_get_datasets(session)
+
+    def test_get_user_profile(session):
+        assert check_get_user_profile(session)
+
+def write_lines(lines):
+    """把一个测试收集到的输出一次性写到 stdout"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+def run_buffered(test, *args):
+    """运行测试并缓冲其输出, 结束后整体写出"""
+    lines = []
+    result = test(*args, out=lines.append)
+    write_lines(lines)
+    return result
+
 def main():
     """运行所有测试"""
-    print("\n" + "=" * 50)
-    print("Alpha Miner 模块测试")
-    print("=" * 50 + "\n")
+    print(BANNER_START)
     
     # 测试1: 配置读取
-    if not test_config():
+    if not run_buffered(check_config):
         print("\n❌ 配置读取失败，终止测试")
         return
     
     # 测试2: 认证
-    session = test_authentication()
+    session = run_buffered(check_authentication)
     if not session:
         print("\n❌ 认证失败，终止测试")
         return
     
-    # 测试3: 获取datasets
-    test_get_datasets(session)
-    
-    # 测试4: 获取用户信息
-    test_get_user_profile(session)
+    # 测试3/4: 获取datasets和用户信息 — 两个请求互不依赖, 并发执行;
+    # 各自的输出先收集起来, 再按顺序打印, 避免交错
+    outputs = ([], [])
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(check_get_datasets, session, outputs[0].append),
+            executor.submit(check_get_user_profile, session, outputs[1].append),
+        ]
+        for future in futures:
+            future.result()
+    for lines in outputs:
+        write_lines(lines)
     
-    print("\n" + "=" * 50)
-    print("测试完成")
-    print("=" * 50)
+    print(BANNER_DONE)
 
 if __name__ == '__main__':
     main()
@@ -148,6 +148,37 @@ app = Flask(__name__)
 app.secret_key = 'brain_template_decoder_secret_key_change_in_production'
 CORS(app)
 
+# Serialize JSON responses with orjson when it is installed (optional dependency)
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson, keeping Flask's fallbacks for dates etc.
+
+        Anything orjson rejects (e.g. float subclasses) is serialized by the stdlib provider.
+        """
+
+        def dumps(self, obj, **kwargs):
+            option = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                      | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except TypeError:
+                return super().dumps(obj, **kwargs)
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+    print("⚡ Using orjson for JSON responses")
+except ImportError:
+    pass
+
 print("🌐 Flask application initialized with CORS support!")
 
 # BRAIN API configuration